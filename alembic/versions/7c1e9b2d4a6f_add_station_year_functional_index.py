@@ -0,0 +1,30 @@
+"""add station year functional index
+
+Revision ID: 7c1e9b2d4a6f
+Revises: 4f38fc1993b4
+Create Date: 2026-10-15 10:12:41.518203
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e9b2d4a6f'
+down_revision: Union[str, Sequence[str], None] = '4f38fc1993b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Must match the year expression analyze.py groups by
+    op.create_index(
+        "ix_weather_station_year",
+        "weather",
+        ["station_id", sa.text("CAST(strftime('%Y', date) AS INTEGER)")],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_weather_station_year", table_name="weather")
@@ -0,0 +1,42 @@
+"""add generated year column to weather
+
+Revision ID: d2b7e5f3c8a1
+Revises: 7c1e9b2d4a6f
+Create Date: 2026-10-15 11:47:09.806412
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b7e5f3c8a1'
+down_revision: Union[str, Sequence[str], None] = '7c1e9b2d4a6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+YEAR_EXPRESSION = "CAST(strftime('%Y', date) AS INTEGER)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Replaced by an index on the generated column
+    op.drop_index("ix_weather_station_year", table_name="weather")
+
+    # SQLite can only add VIRTUAL generated columns with ALTER TABLE;
+    # the index below still stores the computed year
+    op.add_column(
+        "weather",
+        sa.Column("year", sa.Integer(), sa.Computed(YEAR_EXPRESSION, persisted=False)),
+    )
+    op.create_index("ix_weather_station_year", "weather", ["station_id", "year"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_weather_station_year", table_name="weather")
+    op.drop_column("weather", "year")
+    op.create_index(
+        "ix_weather_station_year",
+        "weather",
+        ["station_id", sa.text(YEAR_EXPRESSION)],
+    )
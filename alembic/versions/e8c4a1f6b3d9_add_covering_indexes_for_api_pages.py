@@ -0,0 +1,42 @@
+"""add covering indexes for api pages
+
+Revision ID: e8c4a1f6b3d9
+Revises: d2b7e5f3c8a1
+Create Date: 2026-10-15 14:21:37.190254
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c4a1f6b3d9'
+down_revision: Union[str, Sequence[str], None] = 'd2b7e5f3c8a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Key on the sort columns; PostgreSQL INCLUDEs the selected columns so
+    # page queries can be answered with index-only scans. Other backends
+    # ignore postgresql_include and get a plain composite index.
+    op.create_index(
+        "ix_weather_station_date_covering",
+        "weather",
+        ["station_id", "date"],
+        postgresql_include=["max_temp", "min_temp", "precipitation"],
+    )
+    op.create_index(
+        "ix_weather_stats_station_year_covering",
+        "weather_stats",
+        ["station_id", "year"],
+        postgresql_include=["avg_max_temp", "avg_min_temp", "total_precipitation"],
+    )
+    # Refresh planner statistics so the new indexes are picked up
+    op.execute(sa.text("ANALYZE"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_weather_stats_station_year_covering", table_name="weather_stats")
+    op.drop_index("ix_weather_station_date_covering", table_name="weather")
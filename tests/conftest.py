@@ -1,12 +1,58 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 from weather_analytics_api.api import app
+from weather_analytics_api.db import Base, init_db
 from weather_analytics_api.routers.auth import create_access_token
 
+TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest.fixture(scope="session")
+async def test_engine():
+    # One in-memory database and schema for the whole test run
+    engine = create_async_engine(TEST_DB_URL, echo=False)
+
+    # pysqlite defers BEGIN, which breaks SAVEPOINT-based isolation;
+    # let SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
 
 @pytest.fixture
+async def test_session(test_engine):
+    # Each test runs inside a transaction that is rolled back afterwards;
+    # commits made by the code under test only release savepoints
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        yield session
+        await session.close()
+        await trans.rollback()
+
+
+@pytest.fixture(scope="session")
 async def async_client():
+    # Shared by all tests; tests pass headers per request and must not
+    # change client state (cookies, default headers)
+    # ASGITransport does not run the app lifespan, so create tables here
+    await init_db()
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
@@ -2,31 +2,10 @@ from datetime import date
 
 import pytest
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
 
 from weather_analytics_api.analyze import compute_weather_stats
-from weather_analytics_api.db import Base
 from weather_analytics_api.models import Weather, WeatherStats
 
-TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
-
-
-@pytest.fixture
-async def test_session():
-    # Create async engine and session
-    engine = create_async_engine(TEST_DB_URL, echo=False)
-    async_session = sessionmaker(
-        bind=engine, class_=AsyncSession, expire_on_commit=False
-    )
-
-    # Create tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    async with async_session() as session:
-        yield session
-
 
 @pytest.mark.asyncio
 async def test_compute_weather_stats(test_session):
@@ -76,3 +55,41 @@ async def test_compute_weather_stats(test_session):
     assert stats[1].avg_max_temp == 15
     assert stats[1].avg_min_temp == 7
     assert stats[1].total_precipitation == 2
+
+
+@pytest.mark.asyncio
+async def test_compute_weather_stats_rerun_updates(test_session):
+    async with test_session.begin():
+        test_session.add(
+            Weather(
+                station_id="ST1",
+                date=date(2025, 1, 1),
+                max_temp=10,
+                min_temp=None,
+                precipitation=1,
+            )
+        )
+
+    assert await compute_weather_stats(test_session) == 1
+
+    async with test_session.begin():
+        test_session.add(
+            Weather(
+                station_id="ST1",
+                date=date(2025, 1, 2),
+                max_temp=20,
+                min_temp=None,
+                precipitation=2,
+            )
+        )
+
+    # Re-running updates the existing row instead of inserting a duplicate
+    await compute_weather_stats(test_session)
+
+    result = await test_session.execute(select(WeatherStats))
+    stats = result.scalars().all()
+
+    assert len(stats) == 1
+    assert stats[0].avg_max_temp == 15
+    assert stats[0].avg_min_temp is None  # no valid data
+    assert stats[0].total_precipitation == 3
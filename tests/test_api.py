@@ -1,8 +1,74 @@
+import base64
+from datetime import date
+
 import pytest
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.future import select
 
-from weather_analytics_api.db import get_db
-from weather_analytics_api.models import Weather
+from weather_analytics_api.api import app
+from weather_analytics_api.cache import count_cache, stats_cache, weather_cache
+from weather_analytics_api.db import Base, get_db, init_db
+from weather_analytics_api.models import Weather, WeatherStats
+from weather_analytics_api.routers.weather import count_and_stream, encode_cursor
+
+
+@pytest.fixture
+async def seeded_client(async_client, test_session):
+    # Serve the API from the rolled-back test session with known rows
+    async with test_session.begin():
+        test_session.add_all(
+            [
+                Weather(
+                    station_id="ST1",
+                    date=date(2025, 1, 1),
+                    max_temp=10.0,
+                    min_temp=5.0,
+                    precipitation=0.0,
+                ),
+                Weather(
+                    station_id="ST1",
+                    date=date(2025, 1, 2),
+                    max_temp=None,
+                    min_temp=6.0,
+                    precipitation=0.5,
+                ),
+                Weather(
+                    station_id="ST2",
+                    date=date(2025, 1, 1),
+                    max_temp=15.0,
+                    min_temp=7.0,
+                    precipitation=2.0,
+                ),
+                WeatherStats(
+                    station_id="ST1",
+                    year=2024,
+                    avg_max_temp=11.0,
+                    avg_min_temp=4.0,
+                    total_precipitation=30.0,
+                ),
+                WeatherStats(
+                    station_id="ST1",
+                    year=2025,
+                    avg_max_temp=10.0,
+                    avg_min_temp=5.5,
+                    total_precipitation=0.5,
+                ),
+            ]
+        )
+
+    async def override_get_db():
+        yield test_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    stats_cache.clear()
+    weather_cache.clear()
+    count_cache.clear()
+    yield async_client
+    app.dependency_overrides.clear()
+    stats_cache.clear()
+    weather_cache.clear()
+    count_cache.clear()
 
 
 @pytest.mark.asyncio
@@ -23,9 +89,188 @@ async def test_get_weather_stats(async_client, auth_headers):
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_get_weather_filters_and_paginates(seeded_client):
+    response = await seeded_client.get(
+        "/api/weather/", params={"station_id": "ST1", "limit": 1, "page": 2}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["pagination"]["total"] == 2
+    assert body["pagination"]["pages"] == 2
+    assert body["data"] == [
+        {
+            "station_id": "ST1",
+            "date": "2025-01-02",
+            "max_temp": None,
+            "min_temp": 6.0,
+            "precipitation": 0.5,
+        }
+    ]
+
+    response = await seeded_client.get("/api/weather/", params={"date": "2025-01-01"})
+    body = response.json()
+    assert body["pagination"]["total"] == 2
+    assert [row["station_id"] for row in body["data"]] == ["ST1", "ST2"]
+
+
+@pytest.mark.asyncio
+async def test_total_is_cached_unless_exact(seeded_client, test_session):
+    params = {"station_id": "ST2"}
+    response = await seeded_client.get("/api/weather/", params=params)
+    assert response.json()["pagination"]["total"] == 1
+
+    test_session.add(Weather(station_id="ST2", date=date(2025, 1, 2)))
+    await test_session.flush()
+
+    # The whole response is cached too
+    response = await seeded_client.get("/api/weather/", params=params)
+    assert len(response.json()["data"]) == 1
+
+    weather_cache.clear()
+    response = await seeded_client.get("/api/weather/", params=params)
+    assert len(response.json()["data"]) == 2
+    assert response.json()["pagination"]["total"] == 1  # cached
+
+    params["exact_count"] = "true"
+    response = await seeded_client.get("/api/weather/", params=params)
+    assert response.json()["pagination"]["total"] == 2
+
+    # exact_count responses are never served from or stored in the cache
+    test_session.add(Weather(station_id="ST2", date=date(2025, 1, 3)))
+    await test_session.flush()
+    response = await seeded_client.get("/api/weather/", params=params)
+    assert response.json()["pagination"]["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_empty_pages_skip_page_query(seeded_client, test_session, monkeypatch):
+    async def fail_stream(*args, **kwargs):
+        raise AssertionError("page query should be skipped")
+
+    monkeypatch.setattr(test_session, "stream", fail_stream)
+
+    response = await seeded_client.get("/api/weather/", params={"station_id": "NONE"})
+    assert response.json()["data"] == []
+    assert response.json()["pagination"]["total"] == 0
+
+    response = await seeded_client.get("/api/weather/stats", params={"page": 5})
+    assert response.json()["data"] == []
+    assert response.json()["pagination"]["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_total_does_not_skip_page_query(seeded_client, test_session):
+    params = {"station_id": "ST3"}
+    response = await seeded_client.get("/api/weather/", params=params)
+    assert response.json()["data"] == []
+
+    # Rows written by another process only age out the caches via their TTLs;
+    # the stale cached total of 0 must not hide them
+    test_session.add(Weather(station_id="ST3", date=date(2025, 1, 1)))
+    await test_session.flush()
+    weather_cache.clear()
+
+    response = await seeded_client.get("/api/weather/", params=params)
+    assert len(response.json()["data"]) == 1
+    assert response.json()["pagination"]["total"] == 0  # cached
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination(seeded_client):
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = await seeded_client.get("/api/weather/", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        seen += [(row["station_id"], row["date"]) for row in body["data"]]
+        if not body["pagination"]["next_cursor"]:
+            break
+        params["cursor"] = body["pagination"]["next_cursor"]
+
+    assert seen == [
+        ("ST1", "2025-01-01"),
+        ("ST1", "2025-01-02"),
+        ("ST2", "2025-01-01"),
+    ]
+
+    response = await seeded_client.get("/api/weather/stats", params={"limit": 1})
+    cursor = response.json()["pagination"]["next_cursor"]
+    response = await seeded_client.get(
+        "/api/weather/stats", params={"limit": 1, "cursor": cursor}
+    )
+    assert [row["year"] for row in response.json()["data"]] == [2025]
+
+    response = await seeded_client.get("/api/weather/", params={"cursor": "nope"})
+    assert response.status_code == 400
+
+    # Non-integer or out-of-range years are rejected, not passed to the database
+    for cursor in (
+        base64.urlsafe_b64encode(b'["ST1", Infinity]').decode(),
+        encode_cursor("ST1", 10**30),
+        encode_cursor("ST1", 2024.5),
+    ):
+        response = await seeded_client.get(
+            "/api/weather/stats", params={"cursor": cursor}
+        )
+        assert response.status_code == 400
+
+    for station in (["a"], None):
+        for path, key in (
+            ("/api/weather/", "2020-01-01"),
+            ("/api/weather/stats", 2020),
+        ):
+            cursor = encode_cursor(station, key)
+            response = await seeded_client.get(path, params={"cursor": cursor})
+            assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_weather_rejects_invalid_params(seeded_client):
+    for bad_date in ("01/01/2025", "20250101", "2025-W01-3", "2025-1-1"):
+        response = await seeded_client.get("/api/weather/", params={"date": bad_date})
+        assert response.status_code == 400
+
+    response = await seeded_client.get("/api/weather/", params={"limit": 1001})
+    assert response.status_code == 422
+
+    response = await seeded_client.get("/api/weather/stats", params={"page": 0})
+    assert response.status_code == 422
+
+    response = await seeded_client.get("/api/weather/stats", params={"year": 1800})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_weather_stats_filters(seeded_client):
+    response = await seeded_client.get(
+        "/api/weather/stats", params={"station_id": "ST1", "year": 2025}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["pagination"] == {
+        "page": 1,
+        "limit": 100,
+        "total": 1,
+        "pages": 1,
+        "next_cursor": None,
+    }
+    assert body["data"] == [
+        {
+            "station_id": "ST1",
+            "year": 2025,
+            "avg_max_temp": 10.0,
+            "avg_min_temp": 5.5,
+            "total_precipitation": 0.5,
+        }
+    ]
+
+
 @pytest.mark.asyncio
 async def test_query(auth_headers):
     # This test is mainly for debugging the DB
+    await init_db()
     async for db in get_db():
         query = select(Weather).limit(5)
         result = await db.execute(query)
@@ -33,3 +278,27 @@ async def test_query(auth_headers):
         print(rows)
         # Optional assertion to ensure at least one row exists
         assert rows is not None
+
+
+async def test_count_and_stream_uses_second_connection(tmp_path):
+    # A session bound to a pooled engine counts on its own connection
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/weather.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            Weather.__table__.insert(),
+            [{"station_id": "ST1", "date": date(2025, 1, day)} for day in range(1, 4)],
+        )
+
+    count_cache.clear()
+    async with AsyncSession(engine) as session:
+        query = select(Weather.station_id, Weather.date).order_by(Weather.date)
+        count_query = select(func.count()).select_from(Weather)
+        total, result = await count_and_stream(
+            session, query, count_query, Weather, False, ("test",), exact=True
+        )
+        rows = [row async for row in result]
+
+    await engine.dispose()
+    assert total == 3
+    assert [row.date for row in rows] == [date(2025, 1, day) for day in range(1, 4)]
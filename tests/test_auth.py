@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+from weather_analytics_api import auth
+from weather_analytics_api.auth import create_access_token, verify_token
+
+
+def test_verify_token_uses_cache(monkeypatch):
+    token = create_access_token(data={"sub": "testuser"})
+    assert verify_token(token) == "testuser"
+
+    # A cached token is not decoded again
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token should come from the cache")
+
+    monkeypatch.setattr(auth.jwt, "decode", fail_decode)
+    assert verify_token(token) == "testuser"
+
+
+def test_verify_token_rejects_invalid_token():
+    with pytest.raises(HTTPException) as exc_info:
+        verify_token("not-a-jwt")
+    assert exc_info.value.status_code == 401
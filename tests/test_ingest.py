@@ -1,24 +1,18 @@
-import pytest
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-
-from weather_analytics_api.db import Base
-from weather_analytics_api.ingest import ingest_data
-
-TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
+import asyncio
+import zipfile
+from datetime import date
 
+import pytest
+from sqlalchemy import create_engine, text
 
-@pytest.fixture
-async def test_session():
-    engine = create_async_engine(TEST_DB_URL, echo=False)
-    async_session = sessionmaker(
-        bind=engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    async with async_session() as session:
-        yield session
+from weather_analytics_api.cache import weather_cache
+from weather_analytics_api.db import Base, _sync_url
+from weather_analytics_api.ingest import (
+    extract_wx_data,
+    ingest_data,
+    parse_file,
+    parse_line,
+)
 
 
 @pytest.mark.asyncio
@@ -27,6 +21,8 @@ async def test_ingest_file(test_session, tmp_path):
     station_file = tmp_path / "STATION1.txt"
     station_file.write_text("20250101\t100\t50\t0\n" "20250102\t200\t100\t5\n")
 
+    weather_cache.set("stale", b"{}")
+
     # Call ingest_data with the temp directory
     await ingest_data(str(tmp_path), session=test_session)
 
@@ -34,3 +30,164 @@ async def test_ingest_file(test_session, tmp_path):
     result = await test_session.execute(text("SELECT COUNT(*) FROM weather"))
     count = result.scalar()
     assert count == 2  # matches rows in sample file
+
+    # Cached API responses are invalidated by the new rows
+    assert weather_cache.get("stale") is None
+
+
+@pytest.mark.asyncio
+async def test_ingest_batches_and_duplicates(test_session, tmp_path, monkeypatch):
+    monkeypatch.setattr("weather_analytics_api.ingest.BATCH_SIZE", 2)
+
+    station_file = tmp_path / "STATION1.txt"
+    station_file.write_text(
+        "20250101\t100\t50\t0\n"
+        "20250102\t200\t100\t5\n"
+        "20250103\t-9999\t100\t5\n"
+        "20250101\t100\t50\t0\n"  # duplicate within the file
+        "not a valid line\n"
+    )
+
+    assert await ingest_data(str(tmp_path), session=test_session) == (3, 1, 1)
+    # Re-running the ingest must not create duplicates
+    assert await ingest_data(str(tmp_path), session=test_session) == (0, 4, 1)
+
+    result = await test_session.execute(text("SELECT COUNT(*) FROM weather"))
+    assert result.scalar() == 3
+
+    result = await test_session.execute(
+        text("SELECT max_temp FROM weather WHERE date = '2025-01-03'")
+    )
+    assert result.scalar() is None
+
+
+@pytest.mark.asyncio
+async def test_ingest_cancels_parse_ahead_on_early_exit(
+    test_session, tmp_path, monkeypatch
+):
+    for n in range(3):
+        (tmp_path / f"STATION{n}.txt").write_text("20250101\t100\t50\t0\n")
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(test_session, "commit", fail)
+    monkeypatch.setattr(test_session, "rollback", fail)
+
+    with pytest.raises(RuntimeError):
+        await ingest_data(str(tmp_path), session=test_session)
+
+    # No parse-ahead task is left running once ingest_data returns
+    leftover = [
+        task
+        for task in asyncio.all_tasks()
+        if task.get_coro().__qualname__ == "to_thread" and not task.done()
+    ]
+    assert leftover == []
+
+
+@pytest.mark.asyncio
+async def test_ingest_raw_driver(tmp_path, monkeypatch):
+    # Without a session, SQLite ingest goes through sqlite3 executemany
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'raw.db'}")
+    Base.metadata.create_all(sync_engine)
+    monkeypatch.setattr("weather_analytics_api.ingest.sync_engine", sync_engine)
+
+    data_dir = tmp_path / "wx_data"
+    data_dir.mkdir()
+    (data_dir / "STATION1.txt").write_text(
+        "20250101\t100\t50\t0\n" "20250102\t-9999\t100\t5\n"
+    )
+
+    assert await ingest_data(str(data_dir)) == (2, 0, 0)
+    assert await ingest_data(str(data_dir)) == (0, 2, 0)
+
+    with sync_engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT station_id, date, max_temp FROM weather ORDER BY date")
+        ).all()
+
+    assert rows == [("STATION1", "2025-01-01", 10.0), ("STATION1", "2025-01-02", None)]
+
+
+@pytest.mark.asyncio
+async def test_ingest_raw_driver_with_async_sqlite_url(tmp_path, monkeypatch):
+    # DATABASE_URL is an aiosqlite URL for the async engine; the raw path
+    # must still get a sqlite3 engine instead of failing every file
+    url = _sync_url(f"sqlite+aiosqlite:///{tmp_path / 'raw.db'}")
+    assert url == f"sqlite:///{tmp_path / 'raw.db'}"
+
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+    monkeypatch.setattr("weather_analytics_api.ingest.sync_engine", sync_engine)
+
+    data_dir = tmp_path / "wx_data"
+    data_dir.mkdir()
+    (data_dir / "STATION1.txt").write_text("20250101\t100\t50\t0\n")
+
+    assert await ingest_data(str(data_dir)) == (1, 0, 0)
+
+
+def test_extract_wx_data_only_extracts_wx_data(tmp_path, monkeypatch):
+    archive = tmp_path / "main.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("repo-main/", "")
+        zf.writestr("repo-main/README.md", "readme")
+        zf.writestr("repo-main/wx_data/STATION1.txt", "20250101\t100\t50\t0\n")
+
+    monkeypatch.chdir(tmp_path)
+    extract_wx_data(archive, "wx_data")
+
+    assert (tmp_path / "wx_data" / "STATION1.txt").exists()
+    assert not (tmp_path / "repo-main" / "README.md").exists()
+
+
+def test_parse_line():
+    assert parse_line("20250102\t-9999\t100\t5\n") == (
+        date(2025, 1, 2),
+        None,
+        10.0,
+        0.05,
+    )
+    assert parse_line("20251301\t1\t1\t1") is None  # invalid month
+    assert parse_line("2025011\t1\t1\t1") is None
+    assert parse_line("20250101\t1\t1") is None
+
+
+def test_parse_file_skips_lines_parse_line_rejects(tmp_path):
+    station_file = tmp_path / "STATION1.txt"
+    lines = [
+        "20250101\t100\t-9999\t5",
+        "2025011\t1\t1\t1",  # 7-digit date
+        "20250102\t1.0\t1\t1",  # decimal
+        "20250103\t1e2\t1\t1",  # exponent
+        "20250231\t1\t1\t1",  # not a calendar date
+        "20250104\t1\t1",  # missing field
+        "",
+    ]
+    station_file.write_text("\n".join(lines) + "\n")
+
+    records, skipped = parse_file(station_file)
+
+    assert records == [
+        {
+            "date": date(2025, 1, 1),
+            "max_temp": 10.0,
+            "min_temp": None,
+            "precipitation": 0.05,
+        }
+    ]
+    assert skipped == 6
+    assert [line for line in lines if parse_line(line)] == [lines[0]]
+
+
+def test_parse_file_skips_only_the_line_with_a_quote(tmp_path):
+    station_file = tmp_path / "STATION1.txt"
+    station_file.write_text(
+        "20250101\t100\t50\t0\n" '20250102\t"100\t50\t0\n' "20250103\t100\t50\t0\n"
+    )
+
+    records, skipped = parse_file(station_file)
+
+    assert [r["date"] for r in records] == [date(2025, 1, 1), date(2025, 1, 3)]
+    assert skipped == 1
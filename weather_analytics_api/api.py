@@ -1,8 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
+from weather_analytics_api.db import init_db
 from weather_analytics_api.routers import auth, weather
 
-app = FastAPI(title="Weather Analytics API", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables once at startup instead of on every ingest/stats run
+    await init_db()
+    yield
+
+
+# orjson encodes the (large) paginated list responses much faster than json.dumps
+app = FastAPI(
+    title="Weather Analytics API",
+    version="1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Auth endpoints
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
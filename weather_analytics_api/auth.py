@@ -1,14 +1,25 @@
+import time
 from datetime import datetime, timedelta
+from hashlib import blake2b
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
+from weather_analytics_api.cache import TTLCache
 from weather_analytics_api.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Decoded tokens keyed by token hash -> (username, exp), to skip re-verifying
+# the signature on every request (this also covers get_current_user in the
+# weather router). Entries never outlive a token's lifetime and are also
+# checked against exp.
+_token_cache = TTLCache(
+    maxsize=10_000, ttl=min(settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60, 60)
+)
+
 
 def create_access_token(data: dict, expires_delta: Optional[int] = None):
     to_encode = data.copy()
@@ -23,6 +34,13 @@ def create_access_token(data: dict, expires_delta: Optional[int] = None):
 
 
 def verify_token(token: str = Depends(oauth2_scheme)):
+    token_key = blake2b(token.encode(), digest_size=16).digest()
+    cached = _token_cache.get(token_key)
+    if cached is not None:
+        username, exp = cached
+        if exp > time.time():
+            return username
+
     try:
         payload = jwt.decode(
             token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
@@ -32,6 +50,7 @@ def verify_token(token: str = Depends(oauth2_scheme)):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
             )
+        _token_cache.set(token_key, (username, payload.get("exp", 0)))
         return username
     except JWTError:
         raise HTTPException(
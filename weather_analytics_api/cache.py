@@ -0,0 +1,49 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from weather_analytics_api.config import settings
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Responses of GET /api/weather/stats, keyed by query parameters
+stats_cache = TTLCache(maxsize=1024, ttl=settings.STATS_CACHE_TTL_SECONDS)
+
+# Responses of GET /api/weather, keyed by query parameters
+weather_cache = TTLCache(maxsize=1024, ttl=settings.WEATHER_CACHE_TTL_SECONDS)
+
+# Pagination totals, keyed by table name and filter values
+count_cache = TTLCache(maxsize=1024, ttl=settings.COUNT_CACHE_TTL_SECONDS)
@@ -1,14 +1,80 @@
+import logging
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # Database URL from environment or fallback to local SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
 
+# Set DEBUG_SQL=1 to log every SQL statement
+DEBUG_SQL = os.getenv("DEBUG_SQL") == "1"
+if not DEBUG_SQL:
+    # Keep statement logging quiet even if the root logger is set to INFO
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+# Connection pool sizing, reused across FastAPI requests. Each request can hold
+# two connections (page query plus concurrent count), so size for that.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+# Pinging on every checkout costs a round trip; pool_recycle handles stale
+# connections instead. Set DB_POOL_PRE_PING=1 behind flaky networks.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING") == "1"
+
+# Per-connection prepared statement caches for asyncpg (PostgreSQL)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 1024))
+
+# SQLite PRAGMAs applied to every new connection (override e.g. for tests)
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-64000"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", "268435456"),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+
+def _engine_options(url: str, **pool_options) -> dict:
+    """Build create_engine keyword arguments for the given database URL."""
+    options = {"echo": DEBUG_SQL}
+
+    # In-memory SQLite uses a single static connection, so there is no pool to size
+    if ":memory:" in url:
+        return options
+
+    if url.startswith("sqlite"):
+        # Pooled connections are handed between threads
+        options["connect_args"] = {"check_same_thread": False}
+    elif url.startswith("postgresql+asyncpg"):
+        # Repeat page/count queries reuse server-side prepared statements
+        options["connect_args"] = {
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=3600,
+        **pool_options,
+    )
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
 # Async engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(
+    DATABASE_URL, **_engine_options(DATABASE_URL, poolclass=AsyncAdaptedQueuePool)
+)
 
 # Async session factory
 async_session = sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
@@ -29,6 +95,20 @@ async def init_db():
         await conn.run_sync(Base.metadata.create_all)
 
 
+def _sync_url(url: str) -> str:
+    """Sync twin of an async SQLite URL (sqlite+aiosqlite -> plain sqlite3)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.get_driver_name() != "pysqlite":
+        parsed = parsed.set(drivername="sqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
 # For sync operations (like ingest_data)
-sync_engine = create_engine(os.getenv("DATABASE_URL", "sqlite:///./test.db"), echo=True)
+SYNC_DATABASE_URL = _sync_url(os.getenv("DATABASE_URL", "sqlite:///./test.db"))
+sync_engine = create_engine(SYNC_DATABASE_URL, **_engine_options(SYNC_DATABASE_URL))
 SessionLocal = sessionmaker(bind=sync_engine)
+
+# Tune SQLite connections as they are opened
+for _sqlite_engine in (engine.sync_engine, sync_engine):
+    if _sqlite_engine.dialect.name == "sqlite":
+        event.listen(_sqlite_engine, "connect", _set_sqlite_pragmas)
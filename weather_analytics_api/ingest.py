@@ -1,16 +1,20 @@
 import asyncio
+import csv
 import logging
 import os
 import sys
+import tempfile
 import zipfile
-from datetime import datetime
-from io import BytesIO
+from datetime import date, datetime
+from io import StringIO
 
-import aiofiles
 import aiohttp
+import pandas as pd
+from sqlalchemy import bindparam
 from sqlalchemy.dialects.sqlite import insert
 
-from weather_analytics_api.db import Base, async_session, engine
+from weather_analytics_api.cache import count_cache, weather_cache
+from weather_analytics_api.db import async_session, init_db, sync_engine
 
 from .models import Weather
 
@@ -21,21 +25,51 @@ DATA_URL = (
     "https://github.com/corteva/code-challenge-template/archive/refs/heads/main.zip"
 )
 
+# Download read size when streaming the data archive
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Number of parsed rows sent per multi-row INSERT
+BATCH_SIZE = 1000
+
+# Number of files parsed ahead in worker threads while earlier files are written
+PARSE_CONCURRENCY = 8
+
+# Columns of a station file: date, max temp, min temp, precipitation
+COLUMNS = ["date", "max_temp", "min_temp", "precipitation"]
+MISSING_VALUE = -9999
+DATE_PATTERN = r"\d{8}"
+INTEGER_PATTERN = r"[+-]?\d+"
+
+INSERT_OR_IGNORE_SQL = (
+    "INSERT OR IGNORE INTO weather "
+    "(station_id, date, max_temp, min_temp, precipitation) VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def extract_wx_data(archive, data_dir="wx_data"):
+    """Extract only the wx_data folder of the downloaded archive into data_dir."""
+    with zipfile.ZipFile(archive) as zf:
+        root_dir = zf.namelist()[0]
+        wx_data_path = f"{root_dir}wx_data/"
+        members = [name for name in zf.namelist() if name.startswith(wx_data_path)]
+        zf.extractall(members=members)
+    os.rename(wx_data_path, data_dir)
+
 
 async def download_and_extract(data_dir="wx_data"):
     """Download and extract wx_data asynchronously if not found locally."""
     logger.info(f"{data_dir} not found. Downloading from GitHub...")
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(DATA_URL) as response:
-            response.raise_for_status()
-            content = await response.read()
+    # Stream the archive to a temp file instead of buffering it in memory
+    with tempfile.TemporaryFile() as archive:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(DATA_URL) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    archive.write(chunk)
 
-    with zipfile.ZipFile(BytesIO(content)) as zf:
-        root_dir = zf.namelist()[0]
-        wx_data_path = f"{root_dir}wx_data/"
-        zf.extractall()
-        os.rename(wx_data_path, data_dir)
+        # Extraction is blocking disk/CPU work, keep it off the event loop
+        await asyncio.to_thread(extract_wx_data, archive, data_dir)
 
     logger.info(f"Downloaded and extracted {data_dir}.")
 
@@ -48,23 +82,122 @@ def parse_line(line: str):
             raise ValueError(f"Expected 4 fields, got {len(parts)}")
 
         date_str, max_t, min_t, prcp = parts
-        date = datetime.strptime(date_str, "%Y%m%d").date()
+        # Slicing YYYYMMDD is much cheaper than datetime.strptime
+        if len(date_str) != 8 or not date_str.isdigit():
+            raise ValueError(f"Invalid date: {date_str!r}")
+        day = date(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:]))
         max_temp = None if int(max_t) == -9999 else int(max_t) / 10.0
         min_temp = None if int(min_t) == -9999 else int(min_t) / 10.0
         precipitation = None if int(prcp) == -9999 else int(prcp) / 100.0
-        return date, max_temp, min_temp, precipitation
+        return day, max_temp, min_temp, precipitation
     except (ValueError, IndexError) as e:
         logger.warning(f"Skipping malformed line: {line.strip()}: {e}")
         return None
 
 
+def parse_file(path):
+    """
+    Parse a whole station file with pandas.
+
+    Returns a list of row dicts (without station_id) and the number of
+    malformed lines that were skipped.
+    """
+    with open(path, mode="r") as f:
+        text = f.read()
+    line_count = len(text.splitlines())
+
+    df = pd.read_csv(
+        StringIO(text),
+        sep="\t",
+        # Split on tabs only; a stray quote must not swallow the following lines
+        quoting=csv.QUOTE_NONE,
+        header=None,
+        names=COLUMNS,
+        dtype=str,
+        keep_default_na=False,
+        skip_blank_lines=False,
+        on_bad_lines="skip",
+    )
+
+    # Same grammar as parse_line: an 8-digit date and integer values. Checked on
+    # the raw strings, since to_datetime/to_numeric also accept 7-digit dates,
+    # decimals and exponents.
+    date_strs = df["date"].str.strip()
+    value_strs = df[COLUMNS[1:]].apply(lambda col: col.str.strip())
+    valid = date_strs.str.fullmatch(DATE_PATTERN, na=False) & value_strs.apply(
+        lambda col: col.str.fullmatch(INTEGER_PATTERN, na=False)
+    ).all(axis=1)
+    date_strs, value_strs = date_strs[valid], value_strs[valid]
+
+    # Calendar check, e.g. 20250231
+    dates = pd.to_datetime(date_strs, format="%Y%m%d", errors="coerce")
+    valid = dates.notna()
+    dates = dates[valid]
+    values = value_strs[valid].apply(pd.to_numeric)
+
+    values = values.where(values != MISSING_VALUE) / [10.0, 10.0, 100.0]
+    values = values.astype(object).where(values.notna(), None)
+    values.insert(0, "date", dates.dt.date)
+
+    skipped = line_count - len(values)
+    if skipped:
+        logger.warning(f"Skipping {skipped} malformed lines in {path}")
+
+    return values.to_dict("records"), skipped
+
+
+# Built once so SQLAlchemy compiles it once; each batch is bound as an
+# executemany. Duplicates are handled by doing nothing (ignore).
+INSERT_WEATHER = (
+    insert(Weather.__table__)
+    .values(
+        station_id=bindparam("station_id"),
+        date=bindparam("date"),
+        max_temp=bindparam("max_temp"),
+        min_temp=bindparam("min_temp"),
+        precipitation=bindparam("precipitation"),
+    )
+    .on_conflict_do_nothing(index_elements=["station_id", "date"])
+)
+
+
+async def insert_batch(session, batch):
+    """Insert a batch of weather rows, ignoring duplicates. Returns rows inserted."""
+    result = await session.execute(INSERT_WEATHER, batch)
+    return result.rowcount
+
+
+def bulk_insert_sync(rows):
+    """
+    Insert weather row tuples through the raw sqlite3 driver in one transaction.
+    Duplicates are ignored. Returns rows inserted.
+    """
+    connection = sync_engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.executemany(INSERT_OR_IGNORE_SQL, rows)
+        inserted = cursor.rowcount
+        connection.commit()
+        return inserted
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
 async def ingest_data(data_dir="wx_data", session=None):
-    """Ingest weather data using provided async session."""
-    local_session = session or async_session()
+    """
+    Ingest weather data using provided async session.
+
+    Without a session on SQLite (sqlite3 driver), rows are written with
+    executemany through the raw sqlite3 driver, bypassing SQLAlchemy statement overhead.
 
-    # Ensure tables are created asynchronously
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    Returns (new records, duplicates, malformed lines). Counts come from the
+    batch rowcount, which SQLite reports exactly for INSERT ... DO NOTHING.
+    """
+    local_session = session or async_session()
+    use_raw_driver = session is None and sync_engine.dialect.driver == "pysqlite"
 
     total = 0
     duplicates = 0
@@ -80,68 +213,96 @@ async def ingest_data(data_dir="wx_data", session=None):
         files = [f for f in os.listdir(data_dir) if f.endswith(".txt")]
         logger.info(f"Found {len(files)} files to process")
 
-        for i, filename in enumerate(files, 1):
-            station_id = os.path.splitext(filename)[0]
-            path = os.path.join(data_dir, filename)
-            file_records = 0
-            file_duplicates = 0
-
-            logger.info(
-                f"Processing file {i}/{len(files)}: {filename} for station {station_id}"
-            )
-
-            try:
-                async with aiofiles.open(path, mode="r") as f:
-                    async for line in f:
-                        parsed = parse_line(line)
-                        if parsed is None:
-                            skipped += 1
-                            continue
-
-                        date, mx, mn, pr = parsed
-
-                        # Use upsert to handle duplicates gracefully
-                        stmt = insert(Weather).values(
-                            station_id=station_id,
-                            date=date,
-                            max_temp=mx,
-                            min_temp=mn,
-                            precipitation=pr,
-                        )
-
-                        # Handle duplicates by doing nothing (ignore)
-                        stmt = stmt.on_conflict_do_nothing(
-                            index_elements=["station_id", "date"]
-                        )
-
-                        result = await session_ctx.execute(stmt)
-
-                        # Check if row was actually inserted
-                        if result.rowcount > 0:
-                            file_records += 1
-                            total += 1
-                        else:
-                            file_duplicates += 1
-                            duplicates += 1
-
-                # Commit after each file
-                await session_ctx.commit()
+        # Parse files in parallel worker threads, bounded to PARSE_CONCURRENCY
+        # files in flight. Writes stay sequential: SQLite has a single writer.
+        parse_tasks = {}
+
+        def schedule_parse(index):
+            if index < len(files):
+                path = os.path.join(data_dir, files[index])
+                parse_tasks[index] = asyncio.create_task(
+                    asyncio.to_thread(parse_file, path)
+                )
+
+        try:
+            for index in range(PARSE_CONCURRENCY):
+                schedule_parse(index)
+
+            for i, filename in enumerate(files, 1):
+                station_id = os.path.splitext(filename)[0]
+                file_records = 0
+                file_duplicates = 0
+
                 logger.info(
-                    f"Completed {filename}: {file_records} new records, {file_duplicates} duplicates"
+                    f"Processing file {i}/{len(files)}: {filename} for station {station_id}"
                 )
 
-            except Exception as e:
-                logger.error(f"Error processing file {filename}: {e}")
-                await session_ctx.rollback()
-                continue
+                try:
+                    parse_task = parse_tasks.pop(i - 1)
+                    schedule_parse(i - 1 + PARSE_CONCURRENCY)
+                    records, file_skipped = await parse_task
+                    skipped += file_skipped
+
+                    if use_raw_driver:
+                        rows = [
+                            (
+                                station_id,
+                                r["date"].isoformat(),
+                                r["max_temp"],
+                                r["min_temp"],
+                                r["precipitation"],
+                            )
+                            for r in records
+                        ]
+                        file_records = await asyncio.to_thread(bulk_insert_sync, rows)
+                    else:
+                        for offset in range(0, len(records), BATCH_SIZE):
+                            batch = records[offset : offset + BATCH_SIZE]
+                            for record in batch:
+                                record["station_id"] = station_id
+                            file_records += await insert_batch(session_ctx, batch)
+
+                    file_duplicates = len(records) - file_records
+                    total += file_records
+                    duplicates += file_duplicates
+
+                    # Commit after each file
+                    await session_ctx.commit()
+                    logger.info(
+                        f"Completed {filename}: {file_records} new records, {file_duplicates} duplicates"
+                    )
+
+                except Exception as e:
+                    logger.error(f"Error processing file {filename}: {e}")
+                    await session_ctx.rollback()
+                    continue
+        finally:
+            # Parse-ahead tasks left over when ingest stops early (commit or
+            # rollback failure, cancellation): cancel them and collect their
+            # results so no exception goes unretrieved
+            for task in parse_tasks.values():
+                task.cancel()
+            await asyncio.gather(*parse_tasks.values(), return_exceptions=True)
+
+    # Only reaches caches in this process (e.g. ingest_data called from the
+    # API); a separately running API server relies on the cache TTLs
+    weather_cache.clear()
+    count_cache.clear()
 
     duration = datetime.now() - start
     logger.info(f"Ingestion complete in {duration}")
     logger.info(
         f"Total: {total} new records, {duplicates} duplicates, {skipped} malformed lines"
     )
+    return total, duplicates, skipped
+
+
+async def main(data_dir="wx_data"):
+    # Schema creation happens once here (and at API startup), not per run
+    await init_db()
+    await ingest_data(data_dir)
 
 
 if __name__ == "__main__":
     data_dir = sys.argv[1] if len(sys.argv) > 1 else "wx_data"
-    asyncio.run(ingest_data(data_dir))
+    asyncio.run(main(data_dir))
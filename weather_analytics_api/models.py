@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Date, Float, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    Column,
+    Computed,
+    Date,
+    Float,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 
 from .db import Base
 
@@ -8,7 +17,20 @@ from .db import Base
 
 class Weather(Base):
     __tablename__ = "weather"
-    __table_args__ = (UniqueConstraint("station_id", "date", name="uix_station_date"),)
+    __table_args__ = (
+        UniqueConstraint("station_id", "date", name="uix_station_date"),
+        # Backs the per-station, per-year aggregation in analyze.py
+        Index("ix_weather_station_year", "station_id", "year"),
+        # Covers the API's column-level page query in (station_id, date) order:
+        # value columns are INCLUDEd on PostgreSQL (index-only scans), while
+        # other backends get a plain composite index on the key
+        Index(
+            "ix_weather_station_date_covering",
+            "station_id",
+            "date",
+            postgresql_include=["max_temp", "min_temp", "precipitation"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     station_id = Column(String, index=True)
@@ -16,11 +38,29 @@ class Weather(Base):
     max_temp = Column(Float)
     min_temp = Column(Float)
     precipitation = Column(Float)
+    # Year derived from date by SQLite, so grouping by year avoids strftime per row
+    year = Column(
+        Integer,
+        Computed("CAST(strftime('%Y', date) AS INTEGER)", persisted=False),
+    )
 
 
 class WeatherStats(Base):
     __tablename__ = "weather_stats"
-    __table_args__ = (UniqueConstraint("station_id", "year", name="uix_station_year"),)
+    __table_args__ = (
+        UniqueConstraint("station_id", "year", name="uix_station_year"),
+        # Covers the API's column-level page query in (station_id, year) order
+        Index(
+            "ix_weather_stats_station_year_covering",
+            "station_id",
+            "year",
+            postgresql_include=[
+                "avg_max_temp",
+                "avg_min_temp",
+                "total_precipitation",
+            ],
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     station_id = Column(String, index=True)
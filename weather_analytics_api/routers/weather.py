@@ -1,30 +1,191 @@
+import asyncio
+import base64
+import json
 import logging
-from datetime import datetime
+import re
+from dataclasses import dataclass
+from datetime import date as date_type
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import func
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, lambda_stmt, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.pool import StaticPool
 
 from weather_analytics_api.auth import verify_token
+from weather_analytics_api.cache import count_cache, stats_cache, weather_cache
 from weather_analytics_api.db import get_db
 from weather_analytics_api.models import Weather, WeatherStats
 from weather_analytics_api.schemas import (
     PaginatedResponse,
-    PaginationInfo,
     WeatherOut,
     WeatherStatsOut,
 )
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+# Responses are returned as pre-built ORJSONResponses: FastAPI skips the
+# response_model pass (still used for the OpenAPI schema) and encodes with orjson
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Rows fetched per round trip when streaming a page from the database
+STREAM_CHUNK_SIZE = 200
+
+# Valid range of the year filter and stats cursors
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+# Accepted format of the date filter
+DATE_FORMAT = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+# Error details and media type, built once at import
+INVALID_CURSOR = "Invalid cursor"
+INVALID_DATE = "Invalid date format. Use YYYY-MM-DD"
+INTERNAL_ERROR = "Internal server error"
+JSON_MEDIA_TYPE = "application/json"
 
 # HTTPBearer scheme for optional authentication
 bearer_scheme = HTTPBearer()
 
 
+@dataclass
+class Pagination:
+    """Page query parameters shared by the list endpoints, validated by FastAPI."""
+
+    page: int = Query(1, ge=1, description="Page number")
+    limit: int = Query(100, ge=1, le=1000, description="Records per page")
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+
+
+def filter_weather(stmt, station_id: Optional[str], date: Optional[date_type]):
+    """Add the weather endpoint filters to a lambda statement."""
+    if station_id:
+        stmt += lambda s: s.where(Weather.station_id == station_id)
+    if date:
+        stmt += lambda s: s.where(Weather.date == date)
+    return stmt
+
+
+def filter_stats(stmt, station_id: Optional[str], year: Optional[int]):
+    """Add the stats endpoint filters to a lambda statement."""
+    if station_id:
+        stmt += lambda s: s.where(WeatherStats.station_id == station_id)
+    if year:
+        stmt += lambda s: s.where(WeatherStats.year == year)
+    return stmt
+
+
+async def count_rows(
+    conn, dialect: str, model, count_query, filtered: bool, cache_key, exact: bool
+):
+    if not exact and not filtered and dialect == "postgresql":
+        estimate = await conn.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"),
+            {"t": model.__tablename__},
+        )
+        # reltuples is -1 until the table has been analyzed
+        if estimate is not None and estimate >= 0:
+            count_cache.set(cache_key, estimate)
+            return estimate
+
+    total = await conn.scalar(count_query)
+    count_cache.set(cache_key, total)
+    return total
+
+
+async def get_total(
+    db: AsyncSession,
+    model,
+    count_query,
+    filtered: bool,
+    cache_key,
+    exact: bool,
+    engine: Optional[AsyncEngine] = None,
+):
+    """
+    Total row count for pagination.
+
+    Unless `exact` is requested, totals are served from a short-lived cache,
+    and unfiltered PostgreSQL tables use the planner's row estimate instead
+    of a full COUNT(*). With `engine`, a cache miss is counted on a connection
+    of its own instead of on `db`.
+    """
+    if not exact:
+        total = count_cache.get(cache_key)
+        if total is not None:
+            return total
+
+    dialect = db.bind.dialect.name
+    if engine is None:
+        return await count_rows(
+            db, dialect, model, count_query, filtered, cache_key, exact
+        )
+    async with engine.connect() as conn:
+        return await count_rows(
+            conn, dialect, model, count_query, filtered, cache_key, exact
+        )
+
+
+async def count_and_stream(
+    db: AsyncSession,
+    query,
+    count_query,
+    model,
+    filtered: bool,
+    cache_key,
+    exact: bool,
+    offset: Optional[int] = None,
+):
+    """
+    Get the pagination total and start streaming the page rows.
+
+    An AsyncSession can't run two statements at once, so when the session is
+    bound to a pooled engine the count runs on a second connection concurrently
+    with the page query. Sessions bound to a single connection (e.g. an outer
+    test transaction, or in-memory SQLite) run them one after the other.
+
+    When the total was counted by this request before the page query runs and
+    the page is necessarily empty, the page query is skipped and None is
+    returned in place of the rows.
+    """
+    bind = db.bind
+    total = None if exact else count_cache.get(cache_key)
+    if total is not None:
+        # A cached total may predate an ingest run by another process, so it
+        # never proves a page empty
+        return total, await db.stream(
+            query.execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+
+    if isinstance(bind, AsyncEngine) and not isinstance(bind.pool, StaticPool):
+        return await asyncio.gather(
+            get_total(db, model, count_query, filtered, cache_key, exact, engine=bind),
+            db.stream(query.execution_options(yield_per=STREAM_CHUNK_SIZE)),
+        )
+    total = await get_total(db, model, count_query, filtered, cache_key, exact)
+
+    # Planner estimates (unfiltered PostgreSQL tables) may be low, never trust
+    # them to prove a page empty
+    estimated = not (exact or filtered) and bind.dialect.name == "postgresql"
+    if not estimated and (total == 0 or (offset is not None and offset >= total)):
+        return total, None
+
+    return total, await db.stream(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+
+
 # JWT verification dependency (optional - for enhanced security)
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
@@ -44,8 +205,9 @@ async def get_current_user(
 async def get_weather(
     date: Optional[str] = None,  # Single date as per assignment specs
     station_id: Optional[str] = None,
-    page: int = 1,
-    limit: int = 100,
+    pagination: Pagination = Depends(),
+    cursor: Optional[str] = None,
+    exact_count: bool = False,
     db: AsyncSession = Depends(get_db),
     # current_user: str = Depends(get_current_user),  # Uncomment to enable auth
 ):
@@ -56,79 +218,141 @@ async def get_weather(
     - **station_id**: Filter by weather station ID
     - **page**: Page number for pagination (default: 1)
     - **limit**: Number of records per page (default: 100, max: 1000)
+    - **cursor**: `next_cursor` from the previous page; seeks past it instead of
+      using `page` (much faster for deep pages)
+    - **exact_count**: Always run an exact COUNT(*) for `total` instead of using a
+      cached or estimated value
     """
-    # Validate pagination parameters
-    if page < 1:
-        raise HTTPException(status_code=400, detail="Page must be >= 1")
-    if limit < 1 or limit > 1000:
-        raise HTTPException(status_code=400, detail="Limit must be between 1 and 1000")
-
-    try:
-        # Build base query
-        query = select(Weather)
+    page, limit = pagination.page, pagination.limit
 
-        # Apply filters
-        if station_id:
-            query = query.where(Weather.station_id == station_id)
+    # Hot pages are served as already-encoded JSON for WEATHER_CACHE_TTL_SECONDS;
+    # exact_count asks for a fresh count, so it bypasses the cache
+    cache_key = (date, station_id, page, limit, cursor)
+    if not exact_count:
+        cached = weather_cache.get(cache_key)
+        if cached is not None:
+            return Response(cached, media_type=JSON_MEDIA_TYPE)
 
+    try:
+        date_obj = None
         if date:
             try:
-                date_obj = datetime.strptime(date, "%Y-%m-%d").date()
-                query = query.where(Weather.date == date_obj)
+                # fromisoformat is a C fast path, but on Python 3.11+ it also
+                # takes YYYYMMDD and week dates, so pin the format first
+                if not DATE_FORMAT.fullmatch(date):
+                    raise ValueError(date)
+                date_obj = date_type.fromisoformat(date)
             except ValueError:
-                raise HTTPException(
-                    status_code=400, detail="Invalid date format. Use YYYY-MM-DD"
+                raise HTTPException(status_code=400, detail=INVALID_DATE)
+
+        # Only the columns the response needs, without building ORM entities
+        query = filter_weather(
+            lambda_stmt(
+                lambda: select(
+                    Weather.station_id,
+                    Weather.date,
+                    Weather.max_temp,
+                    Weather.min_temp,
+                    Weather.precipitation,
                 )
-
-        # Get total count for pagination
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-
-        # Calculate pagination
-        pages = (total + limit - 1) // limit if total > 0 else 0
-        offset = (page - 1) * limit
+            ),
+            station_id,
+            date_obj,
+        )
+        count_query = filter_weather(
+            lambda_stmt(lambda: select(func.count()).select_from(Weather)),
+            station_id,
+            date_obj,
+        )
 
         # Apply pagination and ordering
-        query = (
-            query.order_by(Weather.station_id, Weather.date).limit(limit).offset(offset)
-        )
-
-        # Execute query
-        result = await db.execute(query)
-        rows = result.scalars().all()
-
-        # Convert to response format
-        weather_data = []
-        for w in rows:
-            weather_data.append(
-                WeatherOut(
-                    station_id=w.station_id,
-                    date=w.date.strftime("%Y-%m-%d"),
-                    max_temp=w.max_temp,
-                    min_temp=w.min_temp,
-                    precipitation=w.precipitation,  # Already in centimeters from ingest
-                )
+        query += lambda s: s.order_by(Weather.station_id, Weather.date).limit(limit)
+        offset = None
+        if cursor:
+            # Keyset pagination: seek past the last row via the (station_id, date)
+            # unique index instead of scanning and discarding `offset` rows
+            try:
+                cursor_station, cursor_date = decode_cursor(cursor)
+                if not isinstance(cursor_station, str):
+                    raise TypeError("cursor station must be a string")
+                cursor_date = date_type.fromisoformat(cursor_date)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+            query += lambda s: s.where(
+                tuple_(Weather.station_id, Weather.date)
+                > tuple_(cursor_station, cursor_date)
             )
+        else:
+            offset = (page - 1) * limit
+            query += lambda s: s.offset(offset)
+
+        # Count the filtered table alongside the page query; rows are streamed in
+        # chunks instead of materializing the whole page next to the response list
+        total, result = await count_and_stream(
+            db,
+            query,
+            count_query,
+            Weather,
+            bool(station_id or date_obj),
+            ("weather", station_id, date),
+            exact_count,
+            offset,
+        )
+        pages = (total + limit - 1) // limit if total > 0 else 0
+
+        # Convert to response format; rows are already typed by the database,
+        # so build plain dicts for orjson instead of validating pydantic models.
+        # result is None when the page is known to be empty.
+        weather_data = (
+            [
+                {
+                    "station_id": w.station_id,
+                    "date": w.date.isoformat(),
+                    "max_temp": w.max_temp,
+                    "min_temp": w.min_temp,
+                    "precipitation": w.precipitation,  # Already in centimeters
+                }
+                async for w in result
+            ]
+            if result is not None
+            else []
+        )
 
-        return PaginatedResponse(
-            data=weather_data,
-            pagination=PaginationInfo(page=page, limit=limit, total=total, pages=pages),
+        next_cursor = None
+        if len(weather_data) == limit:
+            last = weather_data[-1]
+            next_cursor = encode_cursor(last["station_id"], last["date"])
+
+        response = ORJSONResponse(
+            {
+                "data": weather_data,
+                "pagination": {
+                    "page": page,
+                    "limit": limit,
+                    "total": total,
+                    "pages": pages,
+                    "next_cursor": next_cursor,
+                },
+            }
         )
+        if not exact_count:
+            weather_cache.set(cache_key, response.body)
+        return response
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Database error in get_weather: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        raise HTTPException(status_code=500, detail=INTERNAL_ERROR)
 
 
 @router.get("/stats", response_model=PaginatedResponse[WeatherStatsOut])
 async def get_weather_stats(
-    year: Optional[int] = None,
+    year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR),
     station_id: Optional[str] = None,
-    page: int = 1,
-    limit: int = 100,
+    pagination: Pagination = Depends(),
+    cursor: Optional[str] = None,
+    exact_count: bool = False,
     db: AsyncSession = Depends(get_db),
     # current_user: str = Depends(get_current_user),  # Uncomment to enable auth
 ):
@@ -139,70 +363,125 @@ async def get_weather_stats(
     - **station_id**: Filter by weather station ID
     - **page**: Page number for pagination (default: 1)
     - **limit**: Number of records per page (default: 100, max: 1000)
+    - **cursor**: `next_cursor` from the previous page; seeks past it instead of
+      using `page` (much faster for deep pages)
+    - **exact_count**: Always run an exact COUNT(*) for `total` instead of using a
+      cached or estimated value
     """
-    # Validate pagination parameters
-    if page < 1:
-        raise HTTPException(status_code=400, detail="Page must be >= 1")
-    if limit < 1 or limit > 1000:
-        raise HTTPException(status_code=400, detail="Limit must be between 1 and 1000")
-
-    # Validate year if provided
-    if year is not None and (year < 1900 or year > 2100):
-        raise HTTPException(
-            status_code=400, detail="Year must be between 1900 and 2100"
-        )
-
-    try:
-        # Build base query
-        query = select(WeatherStats)
-
-        # Apply filters
-        if station_id:
-            query = query.where(WeatherStats.station_id == station_id)
-
-        if year:
-            query = query.where(WeatherStats.year == year)
+    page, limit = pagination.page, pagination.limit
 
-        # Get total count for pagination
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+    # Stats only change when compute_weather_stats runs, so serve the encoded
+    # response from cache; exact_count asks for a fresh count and bypasses it
+    cache_key = (year, station_id, page, limit, cursor)
+    if not exact_count:
+        cached = stats_cache.get(cache_key)
+        if cached is not None:
+            return Response(cached, media_type=JSON_MEDIA_TYPE)
 
-        # Calculate pagination
-        pages = (total + limit - 1) // limit if total > 0 else 0
-        offset = (page - 1) * limit
+    try:
+        # Only the columns the response needs, without building ORM entities
+        query = filter_stats(
+            lambda_stmt(
+                lambda: select(
+                    WeatherStats.station_id,
+                    WeatherStats.year,
+                    WeatherStats.avg_max_temp,
+                    WeatherStats.avg_min_temp,
+                    WeatherStats.total_precipitation,
+                )
+            ),
+            station_id,
+            year,
+        )
+        count_query = filter_stats(
+            lambda_stmt(lambda: select(func.count()).select_from(WeatherStats)),
+            station_id,
+            year,
+        )
 
         # Apply pagination and ordering
-        query = (
-            query.order_by(WeatherStats.station_id, WeatherStats.year)
-            .limit(limit)
-            .offset(offset)
-        )
-
-        # Execute query
-        result = await db.execute(query)
-        rows = result.scalars().all()
-
-        # Convert to response format
-        stats_data = []
-        for s in rows:
-            stats_data.append(
-                WeatherStatsOut(
-                    station_id=s.station_id,
-                    year=s.year,
-                    avg_max_temp=s.avg_max_temp,
-                    avg_min_temp=s.avg_min_temp,
-                    total_precipitation=s.total_precipitation,  # Already in centimeters
-                )
+        query += lambda s: s.order_by(WeatherStats.station_id, WeatherStats.year).limit(
+            limit
+        )
+        offset = None
+        if cursor:
+            # Keyset pagination: seek past the last row via the (station_id, year)
+            # unique index instead of scanning and discarding `offset` rows
+            try:
+                cursor_station, cursor_year = decode_cursor(cursor)
+                if not isinstance(cursor_station, str):
+                    raise TypeError("cursor station must be a string")
+                # A JSON integer in the filterable range; floats, Infinity and
+                # huge ints would otherwise overflow further down
+                if type(cursor_year) is not int:
+                    raise TypeError("cursor year must be an integer")
+                if not MIN_YEAR <= cursor_year <= MAX_YEAR:
+                    raise ValueError("cursor year out of range")
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+            query += lambda s: s.where(
+                tuple_(WeatherStats.station_id, WeatherStats.year)
+                > tuple_(cursor_station, cursor_year)
             )
+        else:
+            offset = (page - 1) * limit
+            query += lambda s: s.offset(offset)
+
+        # Count the filtered table alongside the page query; rows are streamed in
+        # chunks instead of materializing the whole page next to the response list
+        total, result = await count_and_stream(
+            db,
+            query,
+            count_query,
+            WeatherStats,
+            bool(station_id or year),
+            ("weather_stats", station_id, year),
+            exact_count,
+            offset,
+        )
+        pages = (total + limit - 1) // limit if total > 0 else 0
+
+        # Convert to response format; rows are already typed by the database,
+        # so build plain dicts for orjson instead of validating pydantic models.
+        # result is None when the page is known to be empty.
+        stats_data = (
+            [
+                {
+                    "station_id": s.station_id,
+                    "year": s.year,
+                    "avg_max_temp": s.avg_max_temp,
+                    "avg_min_temp": s.avg_min_temp,
+                    "total_precipitation": s.total_precipitation,  # In centimeters
+                }
+                async for s in result
+            ]
+            if result is not None
+            else []
+        )
 
-        return PaginatedResponse(
-            data=stats_data,
-            pagination=PaginationInfo(page=page, limit=limit, total=total, pages=pages),
+        next_cursor = None
+        if len(stats_data) == limit:
+            last = stats_data[-1]
+            next_cursor = encode_cursor(last["station_id"], last["year"])
+
+        response = ORJSONResponse(
+            {
+                "data": stats_data,
+                "pagination": {
+                    "page": page,
+                    "limit": limit,
+                    "total": total,
+                    "pages": pages,
+                    "next_cursor": next_cursor,
+                },
+            }
         )
+        if not exact_count:
+            stats_cache.set(cache_key, response.body)
+        return response
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Database error in get_weather_stats: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        raise HTTPException(status_code=500, detail=INTERNAL_ERROR)
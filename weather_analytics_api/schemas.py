@@ -1,6 +1,6 @@
 from typing import Generic, List, Optional, TypeVar
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel
 
 T = TypeVar("T")
 
@@ -14,11 +14,6 @@ class WeatherOut(BaseModel):
 
     model_config = {"from_attributes": True}  # Replaces Config.orm_mode
 
-    @field_validator("date", mode="before")
-    @classmethod
-    def format_date(cls, v):
-        return v.strftime("%Y-%m-%d") if hasattr(v, "strftime") else v
-
 
 class WeatherStatsOut(BaseModel):
     station_id: str
@@ -35,6 +30,8 @@ class PaginationInfo(BaseModel):
     limit: int
     total: int
     pages: int
+    # Opaque keyset cursor for the next page; pass it back as ?cursor=
+    next_cursor: Optional[str] = None
 
 
 class PaginatedResponse(BaseModel, Generic[T]):